@@ -0,0 +1,253 @@
+"""
+Shared MCP client for the Eagle test runners
+Keeps one persistent keep-alive connection to the MCP server per thread,
+plus an asyncio connection for the concurrent stress test
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MCP_HOST = 'localhost'
+MCP_PORT = 8080
+MCP_PATH = '/mcp'
+MCP_URL = f'http://{MCP_HOST}:{MCP_PORT}{MCP_PATH}'
+
+# Resolve the endpoint once so connects never go through the resolver
+try:
+    MCP_ADDR = socket.getaddrinfo(MCP_HOST, MCP_PORT, socket.AF_INET, socket.SOCK_STREAM)[0][4]
+except socket.gaierror:
+    MCP_ADDR = (MCP_HOST, MCP_PORT)
+
+HEADERS = {
+    'Host': f'{MCP_HOST}:{MCP_PORT}',
+    'Content-Type': 'application/json'
+}
+
+# Comfortably above the server's default 30s script timeout
+TIMEOUT = 60
+
+# http.client connections are not thread-safe, so each thread gets its own
+_local = threading.local()
+
+
+class MCPHTTPError(Exception):
+    """Raised when the MCP server answers with an HTTP error status"""
+
+    def __init__(self, code, reason, body):
+        super().__init__(f"HTTP Error {code}: {reason}")
+        self.code = code
+        self.reason = reason
+        self.body = body
+
+
+def _dumps(request):
+    # orjson is much faster and already returns bytes; fall back to json
+    if orjson is not None:
+        return orjson.dumps(request)
+    return json.dumps(request).encode('utf-8')
+
+
+def _loads(data):
+    # Both decoders accept the raw UTF-8 bytes, so no str round-trip is needed
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_response(body):
+    """Decode an MCP response body into (response, content)
+
+    content is the tool's JSON text payload decoded, or None when the
+    response carries no result (e.g. a JSON-RPC error)
+    """
+    response = _loads(body)
+    if 'result' in response and response['result']:
+        return response, _loads(response['result']['content'][0]['text'])
+    return response, None
+
+
+def _get_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = http.client.HTTPConnection(*MCP_ADDR, timeout=TIMEOUT)
+        _local.conn = conn
+    return conn
+
+
+def _drop_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def post(request):
+    """Send a JSON-RPC request to the MCP endpoint, returning parse_response() of the reply"""
+    body = _dumps(request)
+
+    # A kept-alive connection may have been closed by the server since the
+    # last call. Only then is the request re-sent on a fresh connection, and
+    # only if no response bytes arrived: the POST may have side effects, so
+    # any other failure must reach the caller rather than run it twice
+    while True:
+        reused = getattr(_local, 'conn', None) is not None
+        conn = _get_connection()
+        try:
+            conn.request('POST', MCP_PATH, body, HEADERS)
+            response = conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            _drop_connection()
+            if reused:
+                continue
+            raise
+        except Exception:
+            _drop_connection()
+            raise
+
+        try:
+            data = response.read()
+        except Exception:
+            _drop_connection()
+            raise
+        break
+
+    if response.will_close:
+        _drop_connection()
+
+    if response.status >= 400:
+        raise MCPHTTPError(response.status, response.reason, data.decode('utf-8', 'replace'))
+
+    return parse_response(data)
+
+
+# Request line and fixed headers for AsyncConnection, encoded once
+_REQUEST_HEAD = (
+    f"POST {MCP_PATH} HTTP/1.1\r\n"
+    + "".join(f"{name}: {value}\r\n" for name, value in HEADERS.items())
+).encode('latin-1')
+
+
+class AsyncConnection:
+    """Keep-alive HTTP/1.1 connection to the MCP server for asyncio callers"""
+
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+
+    async def post(self, request):
+        """Send a JSON-RPC request to the MCP endpoint, returning parse_response() of the reply"""
+        body = _dumps(request)
+        head = _REQUEST_HEAD + b"Content-Length: %d\r\n\r\n" % len(body)
+
+        # Same stale keep-alive handling as the synchronous post(): re-send
+        # only if an already-open connection fails before any response bytes
+        while True:
+            reused = self._writer is not None
+            if not reused:
+                self._reader, self._writer = await asyncio.open_connection(*MCP_ADDR)
+            try:
+                self._writer.write(head + body)
+                await self._writer.drain()
+                status_line = await asyncio.wait_for(self._reader.readuntil(b'\r\n'), TIMEOUT)
+            except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError) as e:
+                await self.close()
+                nothing_received = not isinstance(e, asyncio.IncompleteReadError) or not e.partial
+                if reused and nothing_received:
+                    continue
+                raise
+            except BaseException:
+                await self.close()
+                raise
+
+            try:
+                status, reason, headers, data = await asyncio.wait_for(
+                    self._read_response(status_line), TIMEOUT)
+            except BaseException:
+                await self.close()
+                raise
+            break
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        if status >= 400:
+            raise MCPHTTPError(status, reason, data.decode('utf-8', 'replace'))
+
+        return parse_response(data)
+
+    async def _read_response(self, status_line):
+        reader = self._reader
+
+        parts = status_line.decode('latin-1').split(None, 2)
+        status = int(parts[1])
+        reason = parts[2].strip() if len(parts) > 2 else ''
+
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                if size == 0:
+                    # Skip any trailers up to the terminating blank line
+                    while await reader.readuntil(b'\r\n') != b'\r\n':
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b''.join(chunks)
+        elif 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+        else:
+            # No framing: the body runs until the server closes the connection
+            data = await reader.read()
+            headers['connection'] = 'close'
+
+        return status, reason, headers, data
+
+    async def close(self):
+        """Close the underlying connection; the next post() reconnects"""
+        writer = self._writer
+        self._reader = self._writer = None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class AsyncConnectionPool:
+    """Bounded set of keep-alive AsyncConnections shared by concurrent callers"""
+
+    def __init__(self, max_connections):
+        self._connections = [AsyncConnection() for _ in range(max_connections)]
+        self._idle = asyncio.Queue()
+        for connection in self._connections:
+            self._idle.put_nowait(connection)
+
+    async def post(self, request):
+        """Send a request on the next idle connection, waiting for one if all are busy"""
+        connection = await self._idle.get()
+        try:
+            return await connection.post(request)
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self):
+        """Close every connection in the pool"""
+        await asyncio.gather(*[connection.close() for connection in self._connections])
@@ -4,163 +4,271 @@ Generic Eagle test runner for the DevOps MCP Server
 Can run any Eagle test script through the MCP interface
 """
 
+import argparse
+import glob
+import io
 import json
-import urllib.request
 import sys
 import os
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
+import mcp_client
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# When set, the only place test scripts are looked up
+EAGLE_TESTSCRIPTS_DIR = os.environ.get("EAGLE_TESTSCRIPTS_DIR")
+
+# Search locations, most likely first
+_SEARCH_BASES = (
+    # Relative to this script
+    os.path.join(os.path.dirname(_HERE), 'TestScripts'),
+    # In container
+    '/app/tests/Eagle/TestScripts',
+    # Current directory
+    '',
+)
+
+@lru_cache(maxsize=128)
 def find_test_script(script_name):
     """Find test script in various locations"""
     # If it's already an absolute path and exists, use it
-    if os.path.isabs(script_name) and os.path.exists(script_name):
+    if os.path.isabs(script_name) and os.path.isfile(script_name):
         return script_name
     
-    # Search paths
-    search_paths = [
-        # In container
-        f'/app/tests/Eagle/TestScripts/{script_name}',
-        # Relative to this script
-        Path(__file__).parent.parent / 'TestScripts' / script_name,
-        # Project root
-        Path(__file__).parent.parent.parent.parent / 'tests/Eagle/TestScripts' / script_name,
-        # Current directory
-        script_name
-    ]
-    
-    for path in search_paths:
-        if os.path.exists(path):
-            return str(path)
+    # A pinned scripts directory is authoritative; don't probe anywhere else
+    if EAGLE_TESTSCRIPTS_DIR:
+        path = os.path.join(EAGLE_TESTSCRIPTS_DIR, script_name)
+        if os.path.isfile(path):
+            return path
+        raise FileNotFoundError(f"Could not find test script: {script_name} (EAGLE_TESTSCRIPTS_DIR={EAGLE_TESTSCRIPTS_DIR})")
+    
+    for base in _SEARCH_BASES:
+        path = os.path.join(base, script_name)
+        if os.path.isfile(path):
+            return path
     
     raise FileNotFoundError(f"Could not find test script: {script_name}")
 
-def run_eagle_test(script_path, session_id=None, security_level="Standard", output_format="plain", env_vars=None, working_dir=None):
+@lru_cache(maxsize=128)
+def _read_script(script_path):
+    """Read a test script, caching its contents for repeated runs"""
+    with open(script_path, 'r') as f:
+        return f.read()
+
+# Static part of the JSON-RPC request, built once
+_REQUEST_SKELETON = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "tools/call",
+    "params": {
+        "name": "execute_eagle_script",
+        "arguments": {}
+    }
+}
+
+# Default environment variables for tests, encoded once
+_DEFAULT_ENV_JSON = json.dumps({
+    "TEST_VAR": "test_value_123"
+})
+
+# Default to /tmp for tests
+_DEFAULT_WORKING_DIR = "/tmp"
+
+def run_eagle_test(script_path, session_id=None, security_level="Standard", output_format="plain", env_vars=None, working_dir=None, out=None):
     """Run an Eagle test script through the MCP interface"""
     
     # Read the script
-    with open(script_path, 'r') as f:
-        script_content = f.read()
+    script_content = _read_script(script_path)
     
     # Build arguments
     args = {
         "script": script_content,
         "securityLevel": security_level,
-        "outputFormat": output_format
+        "outputFormat": output_format,
+        # Add environment variables if provided
+        "environmentVariablesJson": json.dumps(env_vars) if env_vars else _DEFAULT_ENV_JSON,
+        # Set working directory
+        "workingDirectory": working_dir or _DEFAULT_WORKING_DIR
     }
     
     if session_id:
         args["sessionId"] = session_id
     
-    # Add environment variables if provided
-    if env_vars:
-        args["environmentVariablesJson"] = json.dumps(env_vars)
-    else:
-        # Default environment variables for tests
-        args["environmentVariablesJson"] = json.dumps({
-            "TEST_VAR": "test_value_123"
-        })
-    
-    # Set working directory
-    if working_dir:
-        args["workingDirectory"] = working_dir
-    else:
-        # Default to /tmp for tests
-        args["workingDirectory"] = "/tmp"
-    
     # Create the request
-    request = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "tools/call",
-        "params": {
-            "name": "execute_eagle_script",
-            "arguments": args
-        }
+    request = _REQUEST_SKELETON | {
+        "params": {**_REQUEST_SKELETON["params"], "arguments": args}
     }
     
     # Send the request
-    req = urllib.request.Request(
-        'http://localhost:8080/mcp',
-        data=json.dumps(request).encode('utf-8'),
-        headers={'Content-Type': 'application/json'}
-    )
-    
     try:
-        response = urllib.request.urlopen(req)
-        result = json.loads(response.read().decode('utf-8'))
+        result, content = mcp_client.post(request)
         
         # Extract and display the result
-        if 'result' in result and result['result']:
-            content = json.loads(result['result']['content'][0]['text'])
-            
+        if content is not None:
             # Print the output
-            print(content['result'])
+            print(content['result'], file=out)
             
             # Show execution details if available
             if 'isSuccess' in content:
-                print(f"\nExecution {'succeeded' if content['isSuccess'] else 'failed'}")
+                print(f"\nExecution {'succeeded' if content['isSuccess'] else 'failed'}", file=out)
             if 'executionId' in content:
-                print(f"Execution ID: {content['executionId']}")
+                print(f"Execution ID: {content['executionId']}", file=out)
             if 'sessionId' in content and content['sessionId']:
-                print(f"Session ID: {content['sessionId']}")
+                print(f"Session ID: {content['sessionId']}", file=out)
             
             return content
         else:
-            print("Error: Unexpected response format")
-            print(json.dumps(result, indent=2))
+            print("Error: Unexpected response format", file=out)
+            print(json.dumps(result, indent=2), file=out)
             return None
             
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error {e.code}: {e.reason}")
-        print(e.read().decode('utf-8'))
+    except mcp_client.MCPHTTPError as e:
+        print(f"HTTP Error {e.code}: {e.reason}", file=out)
+        print(e.body, file=out)
         return None
     except Exception as e:
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=out)
         return None
 
+def _print_summary(total, failed):
+    print("=" * 50)
+    print(f"Ran {total} tests, {len(failed)} failed")
+    for name in sorted(failed):
+        print(f"  - {name}")
+
+def _run_shard(script_path, *args):
+    """Run one script of a sharded directory run, capturing its output"""
+    out = io.StringIO()
+    result = run_eagle_test(script_path, *args, out=out)
+    return result, out.getvalue()
+
+def run_test_dir(test_dir, session_id=None, security_level="Standard", output_format="plain"):
+    """Run every .tcl script in a directory concurrently, returning the failed names"""
+    script_paths = sorted(glob.glob(os.path.join(test_dir, '*.tcl')))
+    if not script_paths:
+        raise FileNotFoundError(f"No .tcl test scripts found in: {test_dir}")
+    
+    # The runs are I/O-bound against the server, so threads are enough;
+    # leave two cores for the server and the rest of the machine
+    max_workers = max(1, (os.cpu_count() or 1) - 2)
+    failed = []
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_run_shard, path, session_id, security_level, output_format): path
+            for path in script_paths
+        }
+        
+        for future in as_completed(futures):
+            name = os.path.basename(futures[future])
+            result, output = future.result()
+            
+            print(f"Running test: {name}")
+            print("=" * 50)
+            print()
+            print(output)
+            
+            if not result or not result.get('isSuccess', True):
+                failed.append(name)
+    
+    _print_summary(len(script_paths), failed)
+    return failed
+
+def run_batch(lines, session_id=None, security_level="Standard", output_format="plain"):
+    """Run one test per JSON line in this process, returning the failed names
+
+    Each line is an object with a "script" name or path and optional
+    "sessionId", "securityLevel" and "outputFormat" overriding the
+    command-line defaults.
+    """
+    total = 0
+    failed = []
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        total += 1
+        name = line
+        try:
+            test = json.loads(line)
+            name = test["script"]
+            script_path = find_test_script(name)
+            
+            print(f"Running test: {os.path.basename(script_path)}")
+            print("=" * 50)
+            print()
+            
+            result = run_eagle_test(
+                script_path,
+                test.get("sessionId", session_id),
+                test.get("securityLevel", security_level),
+                test.get("outputFormat", output_format))
+            print()
+        except Exception as e:
+            print(f"Error: {e}")
+            result = None
+        
+        if not result or not result.get('isSuccess', True):
+            failed.append(name)
+    
+    _print_summary(total, failed)
+    return failed
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="run_eagle_test.py",
+        description="Run Eagle test scripts through the MCP interface",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""examples:
+  python run_eagle_test.py Phase1Complete.test.tcl
+  python run_eagle_test.py SecurityPolicy.test.tcl --security Minimal
+  python run_eagle_test.py SessionPersistenceVerify.test.tcl --session-id abc123
+  python run_eagle_test.py --dir TestScripts
+  printf '%s\\n' '{"script": "RichContext.test.tcl"}' | python run_eagle_test.py --batch""")
+    
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("test_script", nargs="?", help="Test script name or path")
+    target.add_argument("--dir", metavar="DIRECTORY", help="Run every .tcl script in a directory in parallel")
+    target.add_argument("--batch", action="store_true",
+                        help="Run one JSON test per line from stdin, e.g. {\"script\": \"Phase1Complete.test.tcl\"}")
+    
+    parser.add_argument("--session-id", help="Use specific session ID")
+    parser.add_argument("--security", default="Standard",
+                        help="Security level (Minimal, Standard, Elevated, Maximum)")
+    parser.add_argument("--format", default="plain",
+                        help="Output format (plain, json, xml, yaml, table, csv)")
+    return parser
+
 def main():
     """Main entry point"""
-    if len(sys.argv) < 2:
-        print("Usage: python run_eagle_test.py <test_script> [options]")
-        print("\nOptions:")
-        print("  --session-id <id>     Use specific session ID")
-        print("  --security <level>    Security level (Minimal, Standard, Elevated, Maximum)")
-        print("  --format <format>     Output format (plain, json, xml, yaml, table, csv)")
-        print("\nExamples:")
-        print("  python run_eagle_test.py Phase1Complete.test.tcl")
-        print("  python run_eagle_test.py SecurityPolicy.test.tcl --security Minimal")
-        print("  python run_eagle_test.py SessionPersistenceVerify.test.tcl --session-id abc123")
-        sys.exit(1)
+    args = _build_parser().parse_args()
     
-    # Parse arguments
-    script_name = sys.argv[1]
-    session_id = None
-    security_level = "Standard"
-    output_format = "plain"
-    
-    i = 2
-    while i < len(sys.argv):
-        if sys.argv[i] == '--session-id' and i + 1 < len(sys.argv):
-            session_id = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--security' and i + 1 < len(sys.argv):
-            security_level = sys.argv[i + 1]
-            i += 2
-        elif sys.argv[i] == '--format' and i + 1 < len(sys.argv):
-            output_format = sys.argv[i + 1]
-            i += 2
-        else:
-            print(f"Unknown option: {sys.argv[i]}")
+    # Run many tests from stdin in this one process
+    if args.batch:
+        failed = run_batch(sys.stdin, args.session_id, args.security, args.format)
+        sys.exit(1 if failed else 0)
+    
+    # Run a whole directory of tests in parallel shards
+    if args.dir:
+        try:
+            failed = run_test_dir(args.dir, args.session_id, args.security, args.format)
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
             sys.exit(1)
+        sys.exit(1 if failed else 0)
     
     # Find and run the test
     try:
-        script_path = find_test_script(script_name)
+        script_path = find_test_script(args.test_script)
         print(f"Running test: {os.path.basename(script_path)}")
         print("=" * 50)
         print()
         
-        result = run_eagle_test(script_path, session_id, security_level, output_format)
+        result = run_eagle_test(script_path, args.session_id, args.security, args.format)
         
         if result and not result.get('isSuccess', True):
             sys.exit(1)
@@ -1,29 +1,22 @@
 import json
-import urllib.request
 import sys
-import os
+
+import mcp_client
+from run_eagle_test import find_test_script
 
 def run_security_test(security_level):
     """Run security test with specified security level"""
     
-    # Try multiple paths to find the test script
-    script_paths = [
-        '/app/tests/Eagle/TestScripts/SecurityPolicy.test.tcl',  # In container
-        os.path.join(os.path.dirname(__file__), '../TestScripts/SecurityPolicy.test.tcl'),  # Relative
-        '/Users/sean/source/projects/DevOpsMcp/tests/Eagle/TestScripts/SecurityPolicy.test.tcl'  # Absolute
-    ]
-    
-    script_content = None
-    for path in script_paths:
-        if os.path.exists(path):
-            with open(path, 'r') as f:
-                script_content = f.read()
-            break
-    
-    if not script_content:
-        print(f"Error: Could not find SecurityPolicy.test.tcl in any of the expected locations")
+    # Find the test script the same way run_eagle_test does
+    try:
+        script_path = find_test_script('SecurityPolicy.test.tcl')
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
         sys.exit(1)
     
+    with open(script_path, 'r') as f:
+        script_content = f.read()
+    
     # Create the request
     request = {
         "jsonrpc": "2.0",
@@ -43,19 +36,11 @@ def run_security_test(security_level):
     print("=" * (24 + len(security_level)))
     
     # Send the request
-    req = urllib.request.Request(
-        'http://localhost:8080/mcp',
-        data=json.dumps(request).encode('utf-8'),
-        headers={'Content-Type': 'application/json'}
-    )
-    
     try:
-        response = urllib.request.urlopen(req)
-        result = json.loads(response.read().decode('utf-8'))
+        result, content = mcp_client.post(request)
         
         # Extract and print the result
-        if 'result' in result and result['result']:
-            content = json.loads(result['result']['content'][0]['text'])
+        if content is not None:
             print(content['result'])
         else:
             print(json.dumps(result, indent=2))
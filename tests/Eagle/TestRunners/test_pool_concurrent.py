@@ -1,28 +1,28 @@
+import asyncio
 import json
-import urllib.request
-import threading
+import statistics
+import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from array import array
 
-def execute_script(script_id, delay=0):
-    """Execute an Eagle script with a given ID"""
-    
-    # Create a unique script for each execution
-    script_content = f"""
-# Concurrent test script {script_id}
-set scriptId {script_id}
+import mcp_client
+
+# Tcl body shared by every concurrent script. It is identical for every
+# request; scriptId and delay are passed in as variables instead
+_SCRIPT = """
+# Concurrent test script
 set startTime [clock milliseconds]
 
 # Simulate some work
 set sum 0
-for {{set i 1}} {{$i <= 500}} {{incr i}} {{
-    set sum [expr {{$sum + $i}}]
-}}
+for {set i 1} {$i <= 500} {incr i} {
+    set sum [expr {$sum + $i}]
+}
 
 # Add a small delay if requested
-if {{{delay} > 0}} {{
-    after {delay}
-}}
+if {$delay > 0} {
+    after $delay
+}
 
 # Store result in session
 set sessionKey "concurrent_test_$scriptId"
@@ -30,39 +30,50 @@ mcp::session set $sessionKey $sum
 
 # Calculate execution time
 set endTime [clock milliseconds]
-set duration [expr {{$endTime - $startTime}}]
+set duration [expr {$endTime - $startTime}]
 
-puts "Script $scriptId completed in ${{duration}}ms, sum=$sum"
+puts "Script $scriptId completed in ${duration}ms, sum=$sum"
 """
+
+# Per-request variables for _SCRIPT. Numbers in variablesJson arrive in Tcl
+# as doubles (e.g. "100.0"), which `after` rejects, so they are sent as
+# strings; both values are integers, so no JSON escaping is needed
+_VARIABLES_TPL = '{{"scriptId": "{scriptId}", "delay": "{delay}"}}'
+
+# Static part of the JSON-RPC request, built once
+_ENVELOPE = {
+    "jsonrpc": "2.0",
+    "method": "tools/call",
+    "params": {
+        "name": "execute_eagle_script",
+        "arguments": {
+            "script": _SCRIPT,
+            "outputFormat": "plain"
+        }
+    }
+}
+
+async def execute_script(pool, script_id, delay=0):
+    """Execute an Eagle script with a given ID"""
     
+    variables = _VARIABLES_TPL.format_map({'scriptId': script_id, 'delay': delay})
+    
+    params = _ENVELOPE["params"]
     request = {
-        "jsonrpc": "2.0",
+        **_ENVELOPE,
         "id": script_id,
-        "method": "tools/call",
         "params": {
-            "name": "execute_eagle_script",
-            "arguments": {
-                "script": script_content,
-                "outputFormat": "plain"
-            }
+            **params,
+            "arguments": {**params["arguments"], "variablesJson": variables}
         }
     }
     
     try:
-        req = urllib.request.Request(
-            'http://localhost:8080/mcp',
-            data=json.dumps(request).encode('utf-8'),
-            headers={'Content-Type': 'application/json'}
-        )
-        
         start_time = time.time()
-        response = urllib.request.urlopen(req)
+        result, content = await pool.post(request)
         end_time = time.time()
         
-        result = json.loads(response.read().decode('utf-8'))
-        
-        if 'result' in result and result['result']:
-            content = json.loads(result['result']['content'][0]['text'])
+        if content is not None:
             return {
                 'script_id': script_id,
                 'success': True,
@@ -84,61 +95,76 @@ puts "Script $scriptId completed in ${{duration}}ms, sum=$sum"
             'response_time': -1
         }
 
-def main():
-    print("Testing Interpreter Pool with Concurrent Requests")
-    print("================================================")
-    print()
-    
-    # Test parameters
-    num_concurrent = 10  # Number of concurrent requests
-    num_waves = 3       # Number of waves to test
-    
+async def run_all(num_concurrent, num_waves):
+    """Send every wave over one set of keep-alive connections"""
     total_requests = 0
     total_success = 0
     total_failed = 0
     
-    for wave in range(num_waves):
-        print(f"\nWave {wave + 1} - Sending {num_concurrent} concurrent requests...")
-        
-        with ThreadPoolExecutor(max_workers=num_concurrent) as executor:
-            # Submit all tasks
-            futures = []
-            for i in range(num_concurrent):
-                script_id = wave * num_concurrent + i
-                # Add small delays to some scripts to vary execution time
-                delay = (i % 3) * 100  # 0ms, 100ms, or 200ms
-                future = executor.submit(execute_script, script_id, delay)
-                futures.append(future)
+    # Successful response times, stored unboxed in one preallocated buffer
+    times = array('d', [0.0]) * (num_waves * num_concurrent)
+    idx = 0
+    
+    # The server only speaks HTTP/1.1 on this port, so requests cannot be
+    # multiplexed; keep one reusable socket per in-flight request instead
+    pool = mcp_client.AsyncConnectionPool(num_concurrent)
+    
+    try:
+        for wave in range(num_waves):
+            print(f"\nWave {wave + 1} - Sending {num_concurrent} concurrent requests...")
             
-            # Collect results
+            # Add small delays to some scripts to vary execution time
+            # (0ms, 100ms, or 200ms)
+            results = await asyncio.gather(*[
+                execute_script(pool, wave * num_concurrent + i, (i % 3) * 100)
+                for i in range(num_concurrent)
+            ])
+            
+            # Collect results, buffering the report so the wave is
+            # written to stdout in one go
             wave_success = 0
             wave_failed = 0
-            response_times = []
+            wave_start = idx
+            wave_lines = []
             
-            for future in as_completed(futures):
-                result = future.result()
+            for result in results:
                 total_requests += 1
                 
                 if result['success']:
                     wave_success += 1
                     total_success += 1
-                    response_times.append(result['response_time'])
-                    print(f"  ✓ Script {result['script_id']}: {result['output'].strip()}")
+                    times[idx] = result['response_time']
+                    idx += 1
+                    wave_lines.append(f"  ✓ Script {result['script_id']}: {result['output'].strip()}")
                 else:
                     wave_failed += 1
                     total_failed += 1
-                    print(f"  ✗ Script {result['script_id']}: {result['error']}")
+                    wave_lines.append(f"  ✗ Script {result['script_id']}: {result['error']}")
             
-            if response_times:
-                avg_response_time = sum(response_times) / len(response_times)
-                print(f"\nWave {wave + 1} Summary:")
-                print(f"  Success: {wave_success}/{num_concurrent}")
-                print(f"  Failed: {wave_failed}/{num_concurrent}")
-                print(f"  Average response time: {avg_response_time:.3f}s")
-        
-        # Small delay between waves
-        if wave < num_waves - 1:
-            time.sleep(1)
+            if wave_success:
+                avg_response_time = statistics.fmean(times[wave_start:idx])
+                wave_lines.append(f"\nWave {wave + 1} Summary:")
+                wave_lines.append(f"  Success: {wave_success}/{num_concurrent}")
+                wave_lines.append(f"  Failed: {wave_failed}/{num_concurrent}")
+                wave_lines.append(f"  Average response time: {avg_response_time:.3f}s")
+            
+            sys.stdout.write("\n".join(wave_lines) + "\n")
+            sys.stdout.flush()
+    finally:
+        await pool.close()
+    
+    return total_requests, total_success, total_failed, times[:idx]
+
+def main():
+    print("Testing Interpreter Pool with Concurrent Requests")
+    print("================================================")
+    print()
+    
+    # Test parameters
+    num_concurrent = 10  # Number of concurrent requests
+    num_waves = 3       # Number of waves to test
+    
+    total_requests, total_success, total_failed, times = asyncio.run(run_all(num_concurrent, num_waves))
     
     print("\n================================================")
     print("Overall Test Summary:")
@@ -147,6 +173,11 @@ def main():
     print(f"  Total failed: {total_failed}")
     print(f"  Success rate: {(total_success/total_requests*100):.1f}%")
     
+    if len(times) >= 2:
+        percentiles = statistics.quantiles(times, n=100, method='inclusive')
+        print(f"  Response time p50/p95/p99: "
+              f"{percentiles[49]:.3f}s / {percentiles[94]:.3f}s / {percentiles[98]:.3f}s")
+    
     if total_failed == 0:
         print("\n✅ All concurrent requests completed successfully!")
         print("The interpreter pool is handling concurrent load properly.")